@@ -2,6 +2,7 @@
 
 from . import airbnb, blueground, meli, zonaprop
 from .base import HousingPost, ProviderName
+from .common import strip_query_and_fragment
 from .protocol import ProviderConnector
 
 
@@ -39,7 +40,7 @@ def clean_search_url(url: str) -> str:
 
     Example: should not be used for Airbnb or Blueground.
     """
-    return url.split("?")[0].split("#")[0]
+    return strip_query_and_fragment(url)
 
 
 __all__ = [
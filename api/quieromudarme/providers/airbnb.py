@@ -1,10 +1,12 @@
 """Airbnb connector."""
 
 import asyncio
+import functools
 import logging
 import re
 from datetime import date
 from decimal import Decimal
+from operator import itemgetter
 from typing import Annotated, Any, Final, Literal, cast
 
 import niquests
@@ -22,6 +24,14 @@ from .common import gen_user_agent
 
 logger = setup_logger()
 
+_GET_PICTURE: Final = itemgetter("picture")
+
+
+@functools.lru_cache(maxsize=4096)
+def _to_decimal(s: str) -> Decimal:
+    """Parse a cleaned-up price string, cached since nightly rates repeat a lot."""
+    return Decimal(s)
+
 
 class AirbnbHousingPost(HousingPost):
     """A housing post adapted from an Airbnb "room" or "stay".
@@ -85,13 +95,13 @@ class AirbnbHousingPost(HousingPost):
         """Extract price amount from label string with currency."""
         # TODO: simplification for a couple of known cases, not general
         v = v.replace("€ ", "").replace("$", "").replace("USD", "").replace(",", "").strip()
-        return Decimal(v)
+        return _to_decimal(v)
 
     @pc.field_validator("picture_urls", mode="before")
     @classmethod
     def validate_picture_urls(cls, v: list[dict[str, str]]) -> list[str]:
         """Get picture URLs from Airbnb's JSON."""
-        return [pic["picture"] for pic in v]
+        return list(map(_GET_PICTURE, v))
 
     @pc.field_serializer("check_in_date", "check_out_date", when_used="unless-none")
     def serialize_dates(self, v: date) -> str:
@@ -167,7 +177,8 @@ async def _fetch_page_async(url: str, *, cursor: str | None = None) -> AirbnbSea
     params = {"cursor": cursor} if cursor else {}
 
     logger.debug(f"Requesting Airbnb URL {url}, with params {params}")
-    resp = niquests.get(url=url, params=params, headers=headers, timeout=20)
+    async with niquests.AsyncSession() as session:
+        resp = await session.get(url=url, params=params, headers=headers, timeout=20)
 
     resp.raise_for_status()
     if resp.text is None:
@@ -203,18 +214,21 @@ def is_valid_search_url(url: str) -> bool:
     return bool(re.match(r"http(s?)://(www\.)?airbnb\.com/s/[^/?]+/homes\?", url))
 
 
-def get_search_results(
-    url: str, payload: dict[str, Any] | None, *, max_pages: int | None = DEFAULT_MAX_PAGES
+async def aget_search_results(
+    url: str, *, max_pages: int | None = DEFAULT_MAX_PAGES
 ) -> tuple[int, list[HousingPost]]:
-    """Get results for Airbnb search URL."""
-    del payload, max_pages  # unused
+    """Get results for Airbnb search URL, async.
+
+    All pages are fetched within the same event loop.
+    """
+    del max_pages  # unused
 
-    first_page_result = run_async_in_thread(_fetch_page_async(url))
+    first_page_result = await _fetch_page_async(url)
     posts: list[HousingPost] = list(first_page_result.posts)
     logger.info("Found %d pages of results", len(first_page_result.page_cursors))
 
     rest_page_cursors = first_page_result.page_cursors[1:]
-    rest_page_results = run_async_in_thread(_gather_async_pages(url, rest_page_cursors))
+    rest_page_results = await _gather_async_pages(url, rest_page_cursors)
     for page_result in rest_page_results:
         posts.extend(page_result.posts)
 
@@ -228,6 +242,14 @@ def get_search_results(
     return len(posts), posts
 
 
+def get_search_results(
+    url: str, payload: dict[str, Any] | None, *, max_pages: int | None = DEFAULT_MAX_PAGES
+) -> tuple[int, list[HousingPost]]:
+    """Get results for Airbnb search URL."""
+    del payload  # unused
+    return run_async_in_thread(aget_search_results(url, max_pages=max_pages))
+
+
 def fetch_latest_results(
     search: db.GetHousingSearchesResult, *, max_pages: int | None = None
 ) -> list[HousingPost]:
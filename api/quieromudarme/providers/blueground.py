@@ -6,6 +6,7 @@ import math
 import re
 from datetime import date
 from decimal import Decimal
+from operator import itemgetter
 from typing import Any, Final, Literal, Self
 
 import niquests
@@ -25,6 +26,8 @@ BASE_URL: Final = "https://www.theblueground.com/pt-br/"
 MAX_PAGE_SIZE: Final = 50
 DEFAULT_MAX_PAGES: Final = 20
 
+_GET_URL: Final = itemgetter("url")
+
 
 name: Final = ProviderName.BLUEGROUND
 max_results_considered: Final = MAX_PAGE_SIZE * DEFAULT_MAX_PAGES
@@ -76,7 +79,7 @@ class BluegroundHousingPost(HousingPost):
     @classmethod
     def validate_picture_urls(cls, v: list[dict[str, str]]) -> list[str]:
         """Get picture URLs from Blueground's JSON."""
-        return [pic["url"] for pic in v]
+        return list(map(_GET_URL, v))
 
     @pc.model_validator(mode="after")
     def complete_url(self) -> Self:
@@ -127,7 +130,8 @@ async def _fetch_page_async_html(url: str, *, page: int | None = None) -> Bluegr
     params = {"page": str(page)} if page else {}
 
     logger.debug(f"Requesting Blueground URL {url}, with params {params}")
-    resp = niquests.get(url=url, params=params, headers=headers, timeout=20)
+    async with niquests.AsyncSession() as session:
+        resp = await session.get(url=url, params=params, headers=headers, timeout=20)
     resp.raise_for_status()
 
     if resp.text is None:
@@ -156,7 +160,8 @@ async def _fetch_page_async(url: str, *, page: int | None = None) -> BluegroundS
     params = {"items": str(MAX_PAGE_SIZE), "offset": str((page or 0) * MAX_PAGE_SIZE)}
 
     logger.debug(f"Requesting Blueground URL {url}, with params {params}")
-    resp = niquests.get(url=url, params=params, headers=headers, timeout=20)
+    async with niquests.AsyncSession() as session:
+        resp = await session.get(url=url, params=params, headers=headers, timeout=20)
     resp.raise_for_status()
 
     if (data := resp.json()) is None:
@@ -177,13 +182,14 @@ async def _gather_async_pages(url: str, pages: list[int]) -> list[BluegroundSear
     return await asyncio.gather(*tasks)
 
 
-def get_search_results(
-    url: str, payload: dict[str, Any] | None, *, max_pages: int | None = DEFAULT_MAX_PAGES
+async def aget_search_results(
+    url: str, *, max_pages: int | None = DEFAULT_MAX_PAGES
 ) -> tuple[int, list[HousingPost]]:
-    """Get results for Blueground search URL."""
-    del payload  # unused
+    """Get results for Blueground search URL, async.
 
-    first_page_results: BluegroundSearchResult = run_async_in_thread(_fetch_page_async(url))
+    All pages are fetched within the same event loop.
+    """
+    first_page_results = await _fetch_page_async(url)
     posts: list[HousingPost] = list(first_page_results.items)
     logger.info("Found %d results", first_page_results.total_items)
 
@@ -193,9 +199,7 @@ def get_search_results(
             math.ceil(first_page_results.total_items / first_page_results.items_per_page),
         )
     )
-    rest_page_results = run_async_in_thread(
-        _gather_async_pages(url, list(range(2, last_page_num + 1)))
-    )
+    rest_page_results = await _gather_async_pages(url, list(range(2, last_page_num + 1)))
     for page_result in rest_page_results:
         posts.extend(page_result.items)
 
@@ -206,6 +210,14 @@ def get_search_results(
     return first_page_results.total_items, posts
 
 
+def get_search_results(
+    url: str, payload: dict[str, Any] | None, *, max_pages: int | None = DEFAULT_MAX_PAGES
+) -> tuple[int, list[HousingPost]]:
+    """Get results for Blueground search URL."""
+    del payload  # unused
+    return run_async_in_thread(aget_search_results(url, max_pages=max_pages))
+
+
 def fetch_latest_results(
     search: db.GetHousingSearchesResult, *, max_pages: int | None = None
 ) -> list[HousingPost]:
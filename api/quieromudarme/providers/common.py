@@ -1,10 +1,152 @@
 """Common functions for all providers."""
 
+import asyncio
+import contextlib
+import functools
+import re
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, AnyStr, Final
+
 import fake_useragent
+import niquests
+import orjson
+import py_mini_racer
+import tenacity
+
+# Keys of a JS object literal that aren't quoted, as JSON requires
+_JS_UNQUOTED_KEY_RE: Final = re.compile(r"([{,]\s*)([A-Za-z_$][\w$]*)\s*:")
+
+
+# Longest we're willing to wait when a provider asks us to back off with `Retry-After`
+RETRY_AFTER_MAX_SECONDS: Final = 60.0
+
+
+@functools.cache
+def _user_agents() -> fake_useragent.UserAgent:
+    """Shared user agent generator, since loading its data each time is slow."""
+    return fake_useragent.UserAgent(platforms=["pc"])
 
 
 def gen_user_agent() -> str:
     """Generate a random user agent."""
     default_ua = "Mozilla/5.0 (X11; Linux x86_64; rv:000.0) Gecko/20100101 Firefox/000.0"
-    ua = fake_useragent.UserAgent(platforms=["pc"])
-    return ua.random or default_ua
+    return _user_agents().random or default_ua
+
+
+def strip_query_and_fragment(url: str) -> str:
+    """Remove the query string and fragment from a URL."""
+    # Faster than a `urlsplit`/`urlunsplit` round trip, which is pure Python
+    return url.partition("?")[0].partition("#")[0]
+
+
+@functools.cache
+def _script_tag_res(script_id: str, *, as_bytes: bool) -> tuple[re.Pattern[Any], re.Pattern[Any]]:
+    """Regexes for the opening and closing tags of the script with this ID, compiled once."""
+    start_tag, end_tag = rf'<script[^>]*\bid="{re.escape(script_id)}"[^>]*>', "</script>"
+    if as_bytes:
+        return re.compile(start_tag.encode()), re.compile(end_tag.encode())
+    return re.compile(start_tag), re.compile(end_tag)
+
+
+def find_script_content(html: AnyStr, script_id: str) -> AnyStr | None:
+    """Find the content of the script tag with this ID, without parsing the HTML.
+
+    Only the opening tag is matched with a pattern; these scripts are large, so the closing
+    tag is searched for from there on instead of matching the whole script with a lazy `.*?`.
+    Returns None if the script isn't found.
+    """
+    start_tag_re, end_tag_re = _script_tag_res(script_id, as_bytes=isinstance(html, bytes))
+    if (start := start_tag_re.search(html)) is None:
+        return None
+    if (end := end_tag_re.search(html, start.end())) is None:
+        return None
+    return html[start.end() : end.start()]
+
+
+def preloaded_state_js(script_content: str) -> str:
+    """Get the JS object literal assigned to `window.__PRELOADED_STATE__` in a script.
+
+    The assignment is on the script's first line, which is all that's kept.
+    """
+    return (
+        script_content.lstrip()
+        .partition("\n")[0]
+        .removeprefix("window.__PRELOADED_STATE__ = ")
+        .strip()
+        .strip(";")
+    )
+
+
+def parse_js_object(js_content: str) -> Any:  # noqa: ANN401
+    """Parse a JS object literal embedded in a provider's HTML into Python objects.
+
+    In practice it's valid JSON, so that's tried first. Otherwise quote any unquoted keys
+    and try again, and as a last resort have a JS engine stringify it.
+    """
+    with contextlib.suppress(orjson.JSONDecodeError):
+        return orjson.loads(js_content)
+    with contextlib.suppress(orjson.JSONDecodeError):
+        return orjson.loads(_JS_UNQUOTED_KEY_RE.sub(r'\1"\2":', js_content))
+    # A context of its own, since pages are parsed from several threads and the fallback is rare
+    # TODO: wildly unsafe?
+    js_context = py_mini_racer.MiniRacer()
+    return orjson.loads(js_context.eval(f"JSON.stringify({js_content})"))
+
+
+def _parse_retry_after(value: str) -> float | None:
+    """Parse a `Retry-After` header value, either delay seconds or an HTTP date."""
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # Dates in "-0000" are parsed as naive, but HTTP dates are always in UTC
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(tz=UTC)).total_seconds())
+
+
+class WaitRetryAfter(tenacity.wait.wait_base):
+    """Wait as long as the provider asked with `Retry-After`, else fall back to another wait.
+
+    Meant for retries on rate-limited (429) or unavailable (503) responses.
+    """
+
+    def __init__(
+        self, fallback: tenacity.wait.wait_base, max_seconds: float = RETRY_AFTER_MAX_SECONDS
+    ) -> None:
+        """Initialize with the wait to use when there's no usable `Retry-After` header."""
+        self.fallback = fallback
+        self.max_seconds = max_seconds
+
+    def __call__(self, retry_state: tenacity.RetryCallState) -> float:
+        """Get how many seconds to wait before the next attempt."""
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(exc, niquests.HTTPError) and exc.response is not None:
+            retry_after = exc.response.headers.get("Retry-After")
+            if retry_after is not None and (delay := _parse_retry_after(retry_after)) is not None:
+                return min(delay, self.max_seconds)
+        return self.fallback(retry_state)
+
+
+class AsyncRateLimiter:
+    """Space out requests evenly to stay under a rate, for a single event loop.
+
+    Each caller is given the next free slot, so concurrent requests don't all go out at once
+    and nobody waits longer than needed.
+    """
+
+    def __init__(self, max_rate: float) -> None:
+        """Initialize with the maximum number of requests per second."""
+        self.interval = 1 / max_rate
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        """Wait until this caller's slot to make a request."""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
@@ -1,28 +1,41 @@
 """ZonaProp connector."""
 
+import asyncio
+import contextlib
+import itertools
 import os
+import queue
 import random
 import re
-import tempfile
+import threading
+from collections.abc import Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager
+from datetime import UTC, datetime
 from decimal import Decimal
 from typing import Any, Final, cast
 
-import py_mini_racer
+import niquests
 import pydantic as pc
 from bs4 import BeautifulSoup
 from bs4 import Tag as Bs4Tag
-from seleniumbase import SB
+from seleniumbase import SB, BaseCase
 
 from quieromudarme import db
 from quieromudarme.errors import QMError
 from quieromudarme.log import setup_logger
+from quieromudarme.utils import run_async_in_thread
 
 from .base import Currency, HousingPost, ProviderName
-from .common import gen_user_agent
+from .common import find_script_content, gen_user_agent, parse_js_object, preloaded_state_js
 
 DEFAULT_MAX_PAGES: Final = 20
 RESULTS_PER_PAGE: Final = 20
 max_results_considered: Final = DEFAULT_MAX_PAGES * RESULTS_PER_PAGE
+# How many browsers can fetch pages of a single search at once, including the first one
+MAX_BROWSERS: Final = 3
+# How many pages of a single search can be fetched at once without a browser
+MAX_HTTP_CONCURRENCY: Final = 4
 
 logger = setup_logger()
 
@@ -132,6 +145,10 @@ class ZonaPropSearchResult(pc.BaseModel):
         return [f"https://www.zonaprop.com.ar/{p.lstrip('/')}" for p in paths]
 
 
+_SEARCH_URL_RE: Final = re.compile(r"https?://(www\.)?zonaprop\.com\.ar/[a-zA-Z0-9-]+\.html")
+_HTML_SUFFIX_RE: Final = re.compile(r"\.html$")
+
+
 def _process_page_html(page_html: str) -> ZonaPropSearchResult:
     """Process the HTML of a ZonaProp search results page.
 
@@ -139,91 +156,266 @@ def _process_page_html(page_html: str) -> ZonaPropSearchResult:
     converting from JS object to JSON to Python dict, and extracting all the
     relevant information into a ZonaPropSearchResult.
     """
-    # Find the script tag with the preloaded data
-    soup = BeautifulSoup(page_html, "html.parser")
-    script_tag = cast(Bs4Tag | None, soup.find("script", id="preloadedData"))
-    if script_tag is None or script_tag.string is None:
-        logger.error(f"Start of HTML: {page_html[:1000]}")
-        msg = "Could not find preloaded data in ZonaProp search results page"
-        raise ZonaPropError(msg)
+    # Find the script tag with the preloaded data, without parsing the whole HTML if possible
+    script_content = find_script_content(page_html, "preloadedData")
+    if script_content is None:
+        soup = BeautifulSoup(page_html, "html.parser")
+        script_tag = cast(Bs4Tag | None, soup.find("script", id="preloadedData"))
+        if script_tag is None or script_tag.string is None:
+            logger.error(f"Start of HTML: {page_html[:1000]}")
+            msg = "Could not find preloaded data in ZonaProp search results page"
+            raise ZonaPropError(msg)
+        script_content = script_tag.string
+
+    # Parse the JS object, which is usually plain JSON, from the first line of the script
+    js_content = preloaded_state_js(script_content)
+    preloaded_data = parse_js_object(js_content)
+    # Parse the data into a ZonaPropSearchResult
+    return ZonaPropSearchResult.model_validate(preloaded_data)
 
-    # Stringify the JS object and parse it as JSON
-    js_content = (
-        script_tag.string.strip()
-        .splitlines()[0]
-        .replace("window.__PRELOADED_STATE__ = ", "", 1)
-        .strip()
-        .strip(";")
+
+def is_valid_search_url(url: str) -> bool:
+    """Check if the string is a valid ZonaProp search URL."""
+    return bool(_SEARCH_URL_RE.match(url))
+
+
+def _open_browser() -> AbstractContextManager[BaseCase]:
+    """Open a headless browser able to get past ZonaProp's bot protection."""
+    return cast(
+        AbstractContextManager[BaseCase],
+        SB(
+            uc=True,
+            headless2=True,
+            disable_js=True,
+            disable_csp=True,
+            agent=gen_user_agent(),
+            chromium_arg="--no-sandbox,--disable-gpu",
+        ),
     )
-    js_content = f"JSON.stringify({js_content})"
 
-    # To fix a weird bug, write the string to a file, and read it back immediately
-    with tempfile.NamedTemporaryFile(mode="w+t", suffix=".js") as f:
-        f.write(js_content)
-        f.seek(0)
-        js_content = f.read()
 
-    # Parse the JS object into JSON
-    json_preloaded_data = py_mini_racer.MiniRacer().eval(js_content)  # TODO: wildly unsafe?
-    # Parse the JSON into a ZonaPropSearchResult
-    return ZonaPropSearchResult.model_validate_json(json_preloaded_data)
+def _open_validated_page(sb: BaseCase, url: str) -> str:
+    """Open a page in a fresh browser, getting past the bot check, and return its HTML."""
+    logger.debug("Driver connected, first attempt")
+    sb.driver.uc_open_with_reconnect(url, 4)
+    if not sb.is_text_visible("Temporal"):
+        logger.debug("Second attempt, ideally already validated")
+        sb.driver.uc_open_with_reconnect(url, 5)
+    if not sb.is_text_visible("Temporal"):
+        msg = "Failed to get ZonaProp search page"
+        raise ZonaPropError(msg)
+    logger.info("Everything a-ok!")
+    return cast(str, sb.driver.get_page_source())
+
+
+def _fetch_pages_html(
+    sb: BaseCase, numbered_urls: list[tuple[int, str]]
+) -> Iterator[tuple[int, str]]:
+    """Fetch pages one after the other in an already validated browser, yielding their HTML."""
+    for page_num, page_url in numbered_urls:
+        logger.debug(f"Fetching page {page_url}")
+        sb.driver.sleep(5 * random.random())  # noqa: S311
+        sb.driver.default_get(page_url)
+        yield page_num, sb.driver.get_page_source()
+
+
+def _fetch_pages_html_in_new_browser(
+    numbered_urls: list[tuple[int, str]],
+    html_queue: queue.SimpleQueue[tuple[int, str]],
+    stop: threading.Event,
+) -> None:
+    """Fetch pages in a browser of their own and queue their HTML, meant for a worker thread.
+
+    Errors are logged and not raised, since the pages this browser didn't get to are then
+    fetched by the first browser.
+    """
+    try:
+        with _open_browser() as sb:
+            first_page_num, first_page_url = numbered_urls[0]
+            html_queue.put((first_page_num, _open_validated_page(sb, first_page_url)))
+            if stop.is_set():
+                return
+            for numbered_html in _fetch_pages_html(sb, numbered_urls[1:]):
+                html_queue.put(numbered_html)
+                if stop.is_set():
+                    return
+    except Exception:
+        logger.exception("A browser failed to fetch its share of pages")
+
+
+def _html_with_preloaded_data(resp: niquests.Response) -> str | None:
+    """Get the HTML of a response, or None if it doesn't have the preloaded data."""
+    # Decoding the body isn't cached by the response, so do it only once
+    page_html = resp.text
+    if page_html is None or find_script_content(page_html, "preloadedData") is None:
+        return None
+    return page_html
+
+
+async def _fetch_page_html_over_http(
+    session: niquests.AsyncSession, semaphore: asyncio.Semaphore, page_url: str
+) -> str | None:
+    """Fetch a page with a plain HTTP request, or None if it didn't bring the preloaded data."""
+    try:
+        async with semaphore:
+            resp = await session.get(page_url, timeout=15)
+        resp.raise_for_status()
+    except niquests.RequestException as e:
+        logger.warning(f"Failed to fetch page {page_url} without a browser: {e}")
+        return None
+    # Decoding and searching the HTML is CPU-bound, so keep it off the event loop
+    page_html = await asyncio.to_thread(_html_with_preloaded_data, resp)
+    if page_html is None:
+        logger.warning(f"No preloaded data in page {page_url}, maybe a new bot check")
+    return page_html
+
+
+async def _fetch_pages_html_over_http(
+    page_urls: list[str], cookies: dict[str, str], user_agent: str
+) -> list[str | None]:
+    """Fetch pages concurrently without a browser, reusing a validated browser's cookies."""
+    semaphore = asyncio.Semaphore(MAX_HTTP_CONCURRENCY)
+    async with niquests.AsyncSession() as session:
+        session.headers.update({"User-Agent": user_agent})
+        session.cookies = niquests.cookies.cookiejar_from_dict(cookies)
+        return await asyncio.gather(
+            *(_fetch_page_html_over_http(session, semaphore, page_url) for page_url in page_urls)
+        )
 
 
-def is_valid_search_url(url: str) -> bool:
-    """Check if the string is a valid ZonaProp search URL."""
-    return bool(re.match(r"https?://(www\.)?zonaprop\.com\.ar/[a-zA-Z0-9-]+\.html", url))
+def _drain_html_queue(
+    html_queue: queue.SimpleQueue[tuple[int, str]], fetched_html: dict[int, str]
+) -> None:
+    """Collect the pages that worker browsers have fetched so far."""
+    while not html_queue.empty():
+        page_num, page_html = html_queue.get()
+        fetched_html[page_num] = page_html
+
+
+def iter_search_pages(
+    url: str, *, max_pages: int | None = DEFAULT_MAX_PAGES
+) -> Generator[ZonaPropSearchResult, None, None]:
+    """Yield the result pages of a ZonaProp search in order, as soon as they're fetched.
+
+    Once the first page's browser got past the bot check, the rest of the pages are fetched
+    concurrently with plain HTTP requests carrying its cookies. Any that fail are split among up
+    to `MAX_BROWSERS` browsers: the one that got the first page, plus others opened in worker
+    threads, each fetching its share sequentially. If one of the latter fails, the first browser
+    fetches the pages it didn't get to. Pages are processed on the calling thread.
+    """
+    with _open_browser() as sb:
+        first_page_result = _process_page_html(_open_validated_page(sb, url))
+        logger.info(
+            f"Found {first_page_result.total_pages} pages"
+            f" for {first_page_result.total_results} total results"
+        )
+        yield first_page_result
+
+        # Fetch the rest of the pages without a browser if possible
+        max_page = min(max_pages or 1000, first_page_result.total_pages)
+        rest_page_urls = first_page_result.page_urls[1:max_page]
+        cookies = {cookie["name"]: cookie["value"] for cookie in sb.driver.get_cookies()}
+        rest_pages_html = run_async_in_thread(
+            _fetch_pages_html_over_http(rest_page_urls, cookies, sb.get_user_agent())
+        )
+        fetched_html = {
+            page_num: page_html
+            for page_num, page_html in enumerate(rest_pages_html, start=2)
+            if page_html is not None
+        }
+        missing_numbered_urls = [
+            (page_num, page_url)
+            for page_num, page_url in enumerate(rest_page_urls, start=2)
+            if page_num not in fetched_html
+        ]
+        if missing_numbered_urls:
+            logger.info(f"Falling back to browsers for {len(missing_numbered_urls)} pages")
+
+        # Fetch the missing pages, interleaved among browsers so each gets a similar share
+        num_browsers = max(1, min(MAX_BROWSERS, len(missing_numbered_urls)))
+        url_shares = [missing_numbered_urls[i::num_browsers] for i in range(num_browsers)]
+        html_queue: queue.SimpleQueue[tuple[int, str]] = queue.SimpleQueue()
+        stop = threading.Event()
+        next_page_num = 2
+        with ThreadPoolExecutor(max_workers=num_browsers - 1 or 1) as executor:
+            futures = [
+                executor.submit(_fetch_pages_html_in_new_browser, share, html_queue, stop)
+                for share in url_shares[1:]
+            ]
+            try:
+                while next_page_num in fetched_html:
+                    yield _process_page_html(fetched_html.pop(next_page_num))
+                    next_page_num += 1
+                for page_num, page_html in _fetch_pages_html(sb, url_shares[0]):
+                    fetched_html[page_num] = page_html
+                    _drain_html_queue(html_queue, fetched_html)
+                    while next_page_num in fetched_html:
+                        yield _process_page_html(fetched_html.pop(next_page_num))
+                        next_page_num += 1
+                for future in futures:
+                    future.result()  # wait for it
+                _drain_html_queue(html_queue, fetched_html)
+                # Pages left unfetched by a browser that failed
+                left_numbered_urls = [
+                    (page_num, page_url)
+                    for page_num, page_url in missing_numbered_urls
+                    if page_num >= next_page_num and page_num not in fetched_html
+                ]
+                if left_numbered_urls:
+                    logger.info(f"Fetching {len(left_numbered_urls)} pages left by other browsers")
+                for page_num, page_html in _fetch_pages_html(sb, left_numbered_urls):
+                    fetched_html[page_num] = page_html
+                    while next_page_num in fetched_html:
+                        yield _process_page_html(fetched_html.pop(next_page_num))
+                        next_page_num += 1
+                for page_num in sorted(fetched_html):
+                    yield _process_page_html(fetched_html[page_num])
+            finally:
+                # In case of an error or the caller stopping early
+                stop.set()
+
+
+def _only_posts_before(page_result: ZonaPropSearchResult, since: datetime) -> bool:
+    """Whether all posts in a page were last modified before a certain time."""
+    return all(post.modified_at < since for post in page_result.posts)
 
 
 def get_search_results(
-    url: str, payload: dict[str, Any] | None, *, max_pages: int | None = DEFAULT_MAX_PAGES
+    url: str,
+    payload: dict[str, Any] | None,
+    *,
+    max_pages: int | None = DEFAULT_MAX_PAGES,
+    since: datetime | None = None,
 ) -> tuple[int, list[HousingPost]]:
     """Get housing posts from ZonaProp for a certain URL.
 
     Fetch the first page, then fetch the rest, and return a list of HousingPost objects.
     If max_pages is provided, only fetch up to that many pages.
+
+    If `since` is provided, stop after the first page whose posts were all last modified before
+    it. Only meant for searches sorted by most recently published, and when price changes of
+    older posts don't matter, since those may be left out. Pages fetched without a browser are
+    requested all at once, so this mostly saves processing them. A naive `since` is taken to be
+    in UTC.
     """
     del payload
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
     # TODO: remove payload from all the signatures, no?
     logger.debug(f"Fetching ZonaProp search results for url {url}")
     logger.debug(f"User ID: {os.getuid()}")
 
-    with SB(
-        uc=True,
-        headless2=True,
-        disable_js=True,
-        disable_csp=True,
-        agent=gen_user_agent(),
-        chromium_arg="--no-sandbox,--disable-gpu",
-    ) as sb:
-        logger.debug("Driver connected, first attempt")
-        sb.driver.uc_open_with_reconnect(url, 4)
-        if not sb.is_text_visible("Temporal"):
-            logger.debug("Second attempt, ideally already validated")
-            sb.driver.uc_open_with_reconnect(url, 5)
-        if not sb.is_text_visible("Temporal"):
-            msg = "Failed to get ZonaProp search page"
-            raise ZonaPropError(msg)
-        logger.info("Everything a-ok!")
-
-        first_page_html = sb.driver.get_page_source()
-        first_page_result = _process_page_html(first_page_html)
-
-        posts: list[HousingPost] = list(first_page_result.posts)
-        logger.info(
-            f"Found {first_page_result.total_pages} pages"
-            f" for {first_page_result.total_results} total results"
-        )
-
-        # Fetch the rest of the pages
-        max_page = min(max_pages or 1000, first_page_result.total_pages)
-        for page_url in first_page_result.page_urls[1:max_page]:
-            logger.debug(f"Fetching page {page_url}")
-            sb.driver.sleep(5 * random.random())  # noqa: S311
-            sb.driver.default_get(page_url)
-            page_html = sb.driver.get_page_source()
-            page_result = _process_page_html(page_html)
+    with contextlib.closing(iter_search_pages(url, max_pages=max_pages)) as pages:
+        first_page_result = next(pages)
+        posts: list[HousingPost] = []
+        num_pages = 0
+        for page_result in itertools.chain([first_page_result], pages):
             posts.extend(page_result.posts)
-        logger.info(f"Fetched {len(posts)} posts (from {max_page} pages) for search {url}")
+            num_pages += 1
+            if since is not None and _only_posts_before(page_result, since):
+                logger.info(f"Posts in page {num_pages} are older than {since}, skipping the rest")
+                break
+    logger.info(f"Fetched {len(posts)} posts (from {num_pages} pages) for search {url}")
 
     return first_page_result.total_results, posts
 
@@ -234,8 +426,10 @@ def fetch_latest_results(
     """Fetch the latest results for a ZonaProp search."""
     # TODO: remove previous sortings, page numbers, etc.
     # sort by most recent first
-    url = re.sub(r"\.html$", "orden-publicado-descendente.html", search.url)
+    url = _HTML_SUFFIX_RE.sub("orden-publicado-descendente.html", search.url)
 
+    # No `since` cutoff: results are sorted by publication, so price changes of older posts
+    # could be on any page and users are notified of those too
     total_results, posts = get_search_results(url, None, max_pages=max_pages)
     logger.info(
         f"Found {total_results} results for search {search.id} by {search.user.telegram_id}"
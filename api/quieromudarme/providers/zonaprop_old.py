@@ -31,28 +31,34 @@ Query params not covered yet:
 }
 """
 
-import concurrent.futures
-import json
+import asyncio
+import functools
 import logging
-import math
 import random
 import re
 import time
+import weakref
+from collections.abc import Iterable
 from decimal import Decimal
+from http import HTTPStatus
 from typing import Any, Final, Literal, TypeAlias, TypedDict, cast
 
 import niquests
-import py_mini_racer
+import orjson
 import pydantic as pc
 import tenacity
-from bs4 import BeautifulSoup
-from bs4 import Tag as Bs4Tag
 
 from quieromudarme import db
 from quieromudarme.errors import QMError
 from quieromudarme.log import setup_logger
-from quieromudarme.providers.common import gen_user_agent
-from quieromudarme.utils import slugify
+from quieromudarme.providers.common import (
+    AsyncRateLimiter,
+    find_script_content,
+    gen_user_agent,
+    parse_js_object,
+    preloaded_state_js,
+)
+from quieromudarme.utils import run_async_in_thread, slugify
 
 from .base import Currency, HousingPost, ProviderName
 
@@ -147,6 +153,36 @@ CHARACTERISTICS_REVERSE = [
 ]
 CHARACTERISTICS = {slugify(v["labelSuggest"]): v["id"] for v in CHARACTERISTICS_REVERSE}
 
+
+def _slugs_re(slugs: Iterable[str]) -> re.Pattern[str]:
+    """Compile a pattern that finds any of the slugs as whole words in a single pass.
+
+    The lookahead keeps each match zero-width, so slugs that overlap in the text (like
+    "dependencia-servicio" and "servicio-de-limpieza") are all found by `finditer`.
+    """
+    alternatives = "|".join(map(re.escape, sorted(slugs, key=len, reverse=True)))
+    return re.compile(rf"\b(?=({alternatives})\b)")
+
+
+def _find_slugs(slugs_re: re.Pattern[str], path: str) -> set[str]:
+    """Find all slugs matched by a pattern from `_slugs_re` in a path."""
+    return {match.group(1) for match in slugs_re.finditer(path)}
+
+
+# Patterns to find each of the above in a search URL's path, compiled once
+_PROPERTY_TYPES_RE: Final = _slugs_re(PROPERTY_TYPES)
+_OPERATION_TYPE_RE: Final = re.compile("|".join(rf"({ot})" for ot in OPERATION_TYPES))
+_CURRENCIES_RE: Final = _slugs_re(CURRENCIES)
+_CURRENCIES_NOUN: Final = "|".join(f"({c})" for c in CURRENCIES)
+_MEASURE_UNITS_NOUN: Final = "|".join(MEASURE_UNITS)
+_MEASURE_UNIT_COVERED_RE: Final = re.compile(rf"({_MEASURE_UNITS_NOUN})-cubiertos")
+_DISPOSITION_RE: Final = re.compile(
+    f"con-disposicion-({'|'.join(rf'({d})' for d in DISPOSITIONS)})"
+)
+_CHARACTERISTICS_RE: Final = _slugs_re(CHARACTERISTICS)
+
+_SEARCH_URL_RE: Final = re.compile(r"https?://(?:www\.)?zonaprop\.com\.ar/[a-zA-Z0-9-]+\.html")
+
 AnnouncerType: TypeAlias = Literal["ALL", "COMPANY", "PARTICULAR"]
 LocationType: TypeAlias = Literal["province", "city", "valueZone", "zone", "subZone"]
 
@@ -260,6 +296,25 @@ class ZonaPropHousingPost(HousingPost):
         return float(v)
 
 
+# Validates all posts of a page in one call, instead of one model at a time
+_POSTS_ADAPTER: Final = pc.TypeAdapter(list[ZonaPropHousingPost])
+
+
+@functools.lru_cache(maxsize=32)
+def _option_range_res(
+    noun_regex: str,
+) -> tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
+    """Compile the patterns for each form of an option's range, once per noun."""
+    noun_regex = rf"\b({noun_regex})\b"
+    return (
+        re.compile(rf"(desde-)?(\d+)-(hasta-)?(\d+)-{noun_regex}"),
+        re.compile(rf"mas-(de-)?(\d+)-{noun_regex}"),
+        re.compile(rf"(hasta|menos)-(\d+)-{noun_regex}"),
+        re.compile(rf"(\d+)-{noun_regex}"),
+        re.compile(rf"sin-{noun_regex}"),
+    )
+
+
 def _match_option_range(
     q: str, noun_regex: str, default: int | None = None
 ) -> tuple[int | None, int | None]:
@@ -269,35 +324,44 @@ def _match_option_range(
     for example "desde-2-hasta-4-ambientes". Include all variants for the noun,
     e.g. singular and plural, such as "habitacion(es)?".
     """
-    noun_regex = rf"\b({noun_regex})\b"
-    if match := re.search(rf"(desde-)?(\d+)-(hasta-)?(\d+)-{noun_regex}", q):
+    range_re, min_re, max_re, exact_re, none_re = _option_range_res(noun_regex)
+    if match := range_re.search(q):
         return (int(match.group(2)), int(match.group(4)))
-    if match := re.search(rf"mas-(de-)?(\d+)-{noun_regex}", q):
+    if match := min_re.search(q):
         return (int(match.group(2)), default)
-    if match := re.search(rf"(hasta|menos)-(\d+)-{noun_regex}", q):
+    if match := max_re.search(q):
         return (default, int(match.group(2)))
-    if match := re.search(rf"(\d+)-{noun_regex}", q):
+    if match := exact_re.search(q):
         return (int(match.group(1)), int(match.group(1)))
-    if match := re.search(rf"sin-{noun_regex}", q):
+    if match := none_re.search(q):
         return (-1, None)  # special case used in garages, explicit lack of them
     return (default, default)
 
 
-def parse_search_path(url: str) -> QueryPayload:  # noqa: PLR0915, PLR0912, C901
-    """Get the JSON payload for API, from a web search URL."""
+def parse_search_path(url: str) -> QueryPayload:
+    """Get the JSON payload for API, from a web search URL.
+
+    Parsing is cached per URL, since it requests the search page for its location IDs.
+    """
+    return _parse_search_path(url).copy()
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_search_path(url: str) -> QueryPayload:  # noqa: PLR0915, PLR0912, C901
+    """Parse the JSON payload for API from a web search URL, see `parse_search_path`."""
     # TODO: if continuing with this approach, should really do something about
     #       the path parts not matched by anything known
     path = url.split("zonaprop.com.ar/")[-1].split(".html")[0]
     logger.debug("Query path: %s", path)
 
     property_types = []
+    found_property_types = _find_slugs(_PROPERTY_TYPES_RE, path)
     for property_type_slug, property_type_id in PROPERTY_TYPES.items():
-        if re.search(rf"\b{property_type_slug}\b", path):
+        if property_type_slug in found_property_types:
             logger.info("found property_type: %s", property_type_slug)
             property_types.append(property_type_id)
 
-    operation_type_pattern = "|".join(rf"({ot})" for ot in OPERATION_TYPES)
-    operation_type_match = re.search(operation_type_pattern, path)
+    operation_type_match = _OPERATION_TYPE_RE.search(path)
     operation_type = None if operation_type_match is None else operation_type_match.group(0)
     logger.info("found operation_type: %s", operation_type)
 
@@ -308,19 +372,20 @@ def parse_search_path(url: str) -> QueryPayload:  # noqa: PLR0915, PLR0912, C901
     logger.info("found rooms: %s", rooms)
 
     currency = None
+    found_currencies = _find_slugs(_CURRENCIES_RE, path)
     for currency_slug, currency_id in CURRENCIES.items():
-        if re.search(rf"\b{currency_slug}\b", path):
+        if currency_slug in found_currencies:
             currency = currency_id
-    prices = _match_option_range(path, "|".join(f"({c})" for c in CURRENCIES))
+    prices = _match_option_range(path, _CURRENCIES_NOUN)
     logger.info("found currency and prices: %s", (currency, prices))
 
     measure_unit = "m2"
     m2_are_covered = 1
-    square_meters = _match_option_range(path, "|".join(MEASURE_UNITS))
+    square_meters = _match_option_range(path, _MEASURE_UNITS_NOUN)
     if square_meters != (None, None):
         measure_unit = "m2" if "m2" in path else "ha"  # easy path
         m2_are_covered = (  # 1 -> covered m2/ha, 2 -> total m2/ha
-            1 if re.search(rf"({'|'.join(MEASURE_UNITS)})-cubiertos", path) else 2
+            1 if _MEASURE_UNIT_COVERED_RE.search(path) else 2
         )
         logger.info("found square_meters: %s", (square_meters, measure_unit, m2_are_covered))
 
@@ -366,14 +431,14 @@ def parse_search_path(url: str) -> QueryPayload:  # noqa: PLR0915, PLR0912, C901
     elif "mas-de-50-anos" in path:
         building_age = 51
 
-    disposition_pattern = f"con-disposicion-({'|'.join(rf'({d})' for d in DISPOSITIONS)})"
-    disposition_match = re.search(disposition_pattern, path)
+    disposition_match = _DISPOSITION_RE.search(path)
     disposition = None if disposition_match is None else disposition_match.group(1)
     logger.info("found disposition: %s", disposition)
 
     characteristics = []
+    found_characteristics = _find_slugs(_CHARACTERISTICS_RE, path)
     for char_slug, char_id in CHARACTERISTICS.items():
-        if re.search(rf"\b{char_slug}\b", path):
+        if char_slug in found_characteristics:
             characteristics.append(char_id)
 
     multimedia: list[int] = []
@@ -389,7 +454,7 @@ def parse_search_path(url: str) -> QueryPayload:  # noqa: PLR0915, PLR0912, C901
     return QueryPayload(
         sort=None,  # ignoring it
         pagina=1,
-        tipoDePropiedad=",".join(str(pt) for pt in property_types),
+        tipoDePropiedad=",".join(map(str, property_types)),
         tipoDeOperacion=(None if operation_type is None else str(OPERATION_TYPES[operation_type])),
         ambientesminimo=str(spaces[0]),
         ambientesmaximo=str(spaces[1]),
@@ -408,13 +473,13 @@ def parse_search_path(url: str) -> QueryPayload:  # noqa: PLR0915, PLR0912, C901
         publicacion=str(publicacion) if publicacion is not None else None,
         disposicion=DISPOSITIONS[disposition] if disposition is not None else None,
         antiguedad=str(building_age) if building_age is not None else None,
-        grupoTipoDeMultimedia=",".join(str(m) for m in multimedia),
-        province=",".join(str(l_id) for l_id in location_ids["province"]),
-        city=",".join(str(l_id) for l_id in location_ids["city"]),
-        valueZone=",".join(str(l_id) for l_id in location_ids["valueZone"]),
-        zone=",".join(str(l_id) for l_id in location_ids["zone"]),
-        subZone=",".join(str(l_id) for l_id in location_ids["subZone"]),
-        searchbykeyword=",".join(str(c_id) for c_id in characteristics),
+        grupoTipoDeMultimedia=",".join(map(str, multimedia)),
+        province=",".join(map(str, location_ids["province"])),
+        city=",".join(map(str, location_ids["city"])),
+        valueZone=",".join(map(str, location_ids["valueZone"])),
+        zone=",".join(map(str, location_ids["zone"])),
+        subZone=",".join(map(str, location_ids["subZone"])),
+        searchbykeyword=",".join(map(str, characteristics)),
     )
 
 
@@ -442,24 +507,15 @@ def _get_location_ids(url: str) -> dict[LocationType, list[int]]:
         msg = f"No response text found: {resp.status_code=}"
         raise ZonaPropError(msg)
 
-    # Find the script tag with the preloaded data
-    soup = BeautifulSoup(resp.text, "html.parser")
-    script_tag = cast(Bs4Tag | None, soup.find("script", id="preloadedData"))
-    if script_tag is None or script_tag.string is None:
-        raise ZonaPropError
-
-    # Stringify the JS object and parse it as JSON
-    ctx = py_mini_racer.MiniRacer()
-    js_content = (
-        script_tag.string.strip()
-        .splitlines()[0]
-        .replace("window.__PRELOADED_STATE__ = ", "", 1)
-        .strip()
-        .strip(";")
-    )
-    js_content = f"JSON.stringify({js_content})"
-    json_preloaded_data = ctx.eval(js_content)  # TODO: wildly unsafe?
-    preloaded_data = json.loads(json_preloaded_data)
+    # Find the script with the preloaded data, without parsing the whole HTML
+    script_content = find_script_content(resp.text, "preloadedData")
+    if script_content is None:
+        msg = "Could not find preloaded data in ZonaProp page"
+        raise ZonaPropError(msg)
+
+    # Parse the JS object, which is usually plain JSON, from the first line of the script
+    js_content = preloaded_state_js(script_content)
+    preloaded_data = parse_js_object(js_content)
 
     # Extract the necessary data  # TODO: clean up
     # applied_filters = preloaded_data["listStore"]["appliedFilters"]
@@ -479,20 +535,74 @@ fallback_cf_cookies = {
 }
 
 
+CF_COOKIES_TTL_SECONDS: Final = 30 * 60
+
+# Last CloudFlare cookies fetched, with the `time.monotonic()` of when they were
+_cf_cookies_cache: tuple[float, dict[str, str]] | None = None
+# So that concurrent searches wait for a single fetch of the cookies. One per event loop, since
+# searches may also be awaited directly in other loops than `run_async_in_thread`'s
+_cf_cookies_locks: Final[weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
 @tenacity.retry(
     wait=tenacity.wait_exponential(multiplier=1, min=10, max=20),
     stop=tenacity.stop_after_attempt(1),
     before_sleep=tenacity.before_sleep_log(logger, logging.WARNING),
     retry_error_callback=lambda _retry_state: fallback_cf_cookies,
 )
-def _get_cf_cookies() -> dict[str, str]:
-    """Generate valid CloudFlare cookies for ZonaProp's "difficult" endpoints."""
-    headers = {"User-Agent": gen_user_agent()}
-    with niquests.Session() as session:
-        session.quic_cache_layer.add_domain("www.zonaprop.com.ar")
-        resp = session.get("https://www.zonaprop.com.ar", headers=headers, timeout=15)
-        resp.raise_for_status()
-        return session.cookies.get_dict(domain=".zonaprop.com.ar")  # type: ignore [no-any-return]
+async def _get_cf_cookies() -> dict[str, str]:
+    """Generate valid CloudFlare cookies for ZonaProp's "difficult" endpoints.
+
+    They're valid for much longer than a search, so they're reused for `CF_COOKIES_TTL_SECONDS`.
+    """
+    global _cf_cookies_cache  # noqa: PLW0603 (a single cache shared by all searches)
+    lock = _cf_cookies_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+    async with lock:
+        if _cf_cookies_cache is not None:
+            fetched_at, cached_cookies = _cf_cookies_cache
+            if time.monotonic() - fetched_at < CF_COOKIES_TTL_SECONDS:
+                return cached_cookies
+
+        headers = {"User-Agent": gen_user_agent()}
+        async with niquests.AsyncSession() as session:
+            session.quic_cache_layer.add_domain("www.zonaprop.com.ar")
+            resp = await session.get("https://www.zonaprop.com.ar", headers=headers, timeout=15)
+            resp.raise_for_status()
+            cookies = cast(dict[str, str], session.cookies.get_dict(domain=".zonaprop.com.ar"))
+
+        _cf_cookies_cache = (time.monotonic(), cookies)
+        return cookies
+
+
+def _forget_cf_cookies(fetched_before: float) -> None:
+    """Drop the cached CloudFlare cookies if they were fetched before a certain time.
+
+    So that cookies fetched after a rejected request was sent, which are likely fine, are kept.
+    """
+    global _cf_cookies_cache  # noqa: PLW0603 (a single cache shared by all searches)
+    if _cf_cookies_cache is not None and _cf_cookies_cache[0] < fetched_before:
+        _cf_cookies_cache = None
+
+
+_API_URL: Final = "https://www.zonaprop.com.ar/rplis-api/postings"
+_JSON_HEADERS: Final = {"Content-Type": "application/json"}
+
+# Requests to ZonaProp's API are spaced out to stay under this rate, per search
+MAX_REQUESTS_PER_SECOND: Final = 5
+
+
+async def _new_session() -> niquests.AsyncSession:
+    """Create a session to send all requests of a search over one multiplexed connection.
+
+    CloudFlare cookies are also shared by all of the search's requests.
+    """
+    session = niquests.AsyncSession(multiplexed=True)
+    session.quic_cache_layer.add_domain("www.zonaprop.com.ar")
+    session.headers.update({"User-Agent": gen_user_agent()})
+    session.cookies = niquests.cookies.cookiejar_from_dict(await _get_cf_cookies())
+    return session
 
 
 @tenacity.retry(
@@ -500,30 +610,41 @@ def _get_cf_cookies() -> dict[str, str]:
     stop=tenacity.stop_after_attempt(3),
     before_sleep=tenacity.before_sleep_log(logger, logging.WARNING),
 )
-def _fetch_page_of_results(payload: QueryPayload, page: int) -> dict[str, Any]:
-    """Request a page of results from ZonaProp's API."""
-    api_url = "https://www.zonaprop.com.ar/rplis-api/postings"
-    payload = payload.copy()
-    payload["pagina"] = page
-    time.sleep(random.random() * 2.3)  # noqa: S311
+async def _fetch_page_of_results(
+    session: niquests.AsyncSession, rate_limiter: AsyncRateLimiter, payload: QueryPayload, page: int
+) -> dict[str, Any]:
+    """Request a page of results from ZonaProp's API, async."""
+    await rate_limiter.wait()
+
+    body = orjson.dumps({**payload, "pagina": page})
+    sent_at = time.monotonic()
+    resp = await session.post(_API_URL, data=body, headers=_JSON_HEADERS, timeout=15)
+    # The response is lazy in a multiplexed session, so wait for this one to arrive
+    await session.gather(resp)
+    if resp.status_code == HTTPStatus.FORBIDDEN:
+        # CloudFlare stopped accepting our cookies, so get new ones for the retry
+        _forget_cf_cookies(fetched_before=sent_at)
+        session.cookies = niquests.cookies.cookiejar_from_dict(await _get_cf_cookies())
+    resp.raise_for_status()
+
+    if resp.content is None:
+        msg = f"No response content found: {resp.status_code=}"
+        raise ZonaPropError(msg)
 
-    with niquests.Session() as session:
-        cookies = _get_cf_cookies()
-        session.quic_cache_layer.add_domain("www.zonaprop.com.ar")
-        headers = {"User-Agent": gen_user_agent()}
-        resp = session.post(api_url, json=payload, headers=headers, cookies=cookies, timeout=15)
-        resp.raise_for_status()
+    return cast(dict[str, Any], orjson.loads(resp.content))
 
-    if resp.text is None:
-        msg = f"No response text found: {resp.status_code=}"
-        raise ZonaPropError(msg)
 
-    return cast(dict[str, Any], resp.json())
+async def _fetch_page_of_posts(
+    session: niquests.AsyncSession, rate_limiter: AsyncRateLimiter, payload: QueryPayload, page: int
+) -> list[ZonaPropHousingPost]:
+    """Fetch a page of results and validate its posts right away, so its raw JSON can be freed."""
+    page_payload = await _fetch_page_of_results(session, rate_limiter, payload, page)
+    return _POSTS_ADAPTER.validate_python(page_payload["listPostings"])
 
 
 def is_valid_search_url(url: str) -> bool:
     """Check if the string is a valid ZonaProp search URL."""
-    return bool(re.match(r"https?://(www\.)?zonaprop\.com\.ar/[a-zA-Z0-9-]+\.html", url))
+    return bool(_SEARCH_URL_RE.match(url))
 
 
 DEFAULT_MAX_PAGES: Final = 20
@@ -531,6 +652,46 @@ RESULTS_PER_PAGE: Final = 20
 max_results_considered: Final = DEFAULT_MAX_PAGES * RESULTS_PER_PAGE
 
 
+async def aget_search_results(
+    query_payload: QueryPayload, *, max_pages: int | None = DEFAULT_MAX_PAGES
+) -> tuple[int, list[HousingPost]]:
+    """Get housing posts from ZonaProp's API for a query, async.
+
+    Fetch the first page, then fetch the rest concurrently within the same event loop.
+    """
+    rate_limiter = AsyncRateLimiter(MAX_REQUESTS_PER_SECOND)
+    async with await _new_session() as session:
+        first_page_payload = await _fetch_page_of_results(session, rate_limiter, query_payload, 1)
+
+        first_page_results = first_page_payload.get("listPostings") or []
+        if len(first_page_results) == 0 or first_page_payload.get("totalPosting") is None:
+            return 0, []
+
+        total_results = int(first_page_payload["totalPosting"].replace(".", ""))
+        logger.info("Total results should be: %s", total_results)
+
+        num_pages = -(-total_results // RESULTS_PER_PAGE)  # ceiling division
+        if max_pages is not None:
+            num_pages = min(num_pages, max_pages)
+        pages = range(2, num_pages + 1)
+        housing_posts: list[HousingPost] = list(_POSTS_ADAPTER.validate_python(first_page_results))
+        rest_page_posts = await asyncio.gather(
+            *(_fetch_page_of_posts(session, rate_limiter, query_payload, page) for page in pages),
+            return_exceptions=True,
+        )
+
+    # Results from `gather` keep the order of the pages
+    for page, page_posts in zip(pages, rest_page_posts, strict=True):
+        if isinstance(page_posts, BaseException):
+            logger.error("Fetching page %s generated an exception", page, exc_info=page_posts)
+            # TODO: no re-raise?
+            continue
+        housing_posts.extend(page_posts)
+    logger.info("Fetched %s results in %s pages", len(housing_posts), num_pages)
+
+    return total_results, housing_posts
+
+
 def get_search_results(
     url: str, payload: dict[str, Any] | None, *, max_pages: int | None = DEFAULT_MAX_PAGES
 ) -> tuple[int, list[HousingPost]]:
@@ -547,39 +708,23 @@ def get_search_results(
         query_payload = parse_search_path(url)
     else:
         query_payload = QueryPayload(**payload)  # type: ignore [typeddict-item]
-    first_page_payload = _fetch_page_of_results(query_payload, 1)
-
-    first_page_results = first_page_payload.get("listPostings") or []
-    if len(first_page_results) == 0 or first_page_payload.get("totalPosting") is None:
-        return 0, []
-
-    total_results = int(first_page_payload["totalPosting"].replace(".", ""))
-    logger.info("Total results should be: %s", total_results)
-
-    num_pages = math.ceil(total_results / 20)
-    pages = range(2, num_pages if max_pages is None else min(num_pages, max_pages) + 1)
-
-    posts_per_page: dict[int, list[dict[str, Any]]] = {1: first_page_results}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_page = {
-            executor.submit(_fetch_page_of_results, query_payload, page): page for page in pages
-        }
-        for future in concurrent.futures.as_completed(future_to_page):
-            page = future_to_page[future]
-            try:
-                resp_payload = future.result()
-                posts_per_page[page] = resp_payload["listPostings"]
-            except Exception:
-                logger.exception("Fetching page %s generated an exception", page)
-                # TODO: no re-raise?
-
-    posts_in_pages = [v for _, v in sorted(posts_per_page.items(), key=lambda kv: kv[0])]
-    posts: list[dict[str, Any]] = [post for page_posts in posts_in_pages for post in page_posts]
-    logger.info("Fetched %s results in %s pages", len(posts), num_pages)
-
-    housing_posts: list[HousingPost] = [ZonaPropHousingPost(**p) for p in posts]
 
-    return total_results, housing_posts
+    return run_async_in_thread(aget_search_results(query_payload, max_pages=max_pages))
+
+
+def _load_query_payload(query_payload_json: str) -> dict[str, Any]:
+    """Load a search's stored API payload.
+
+    Loading is cached, since the same searches are checked again. A copy is returned, so that
+    setting its keys doesn't change the cached payload.
+    """
+    return _load_query_payload_cached(query_payload_json).copy()
+
+
+@functools.lru_cache(maxsize=1024)
+def _load_query_payload_cached(query_payload_json: str) -> dict[str, Any]:
+    """Load a search's stored API payload, see `_load_query_payload`."""
+    return cast(dict[str, Any], orjson.loads(query_payload_json))
 
 
 def fetch_latest_results(
@@ -591,8 +736,7 @@ def fetch_latest_results(
         msg = f"Search {search.id} has no API query payload. Cannot continue."
         raise ZonaPropError({"message": msg})
 
-    query_payload = json.loads(search.query_payload)
-    query_payload["sort"] = "more_recent"
+    query_payload = {**_load_query_payload(search.query_payload), "sort": "more_recent"}
 
     total_results, results = get_search_results(search.url, query_payload, max_pages=max_pages)
     if total_results == 0:
@@ -30,6 +30,7 @@ class _Settings(BaseSettings):
 
     # Providers settings
     mercadopago_access_token: str
+    meli_max_concurrency: int = 4  # search pages fetched at once from MercadoLibre's website
 
     @property
     def tg_bot_id(self) -> TelegramID:
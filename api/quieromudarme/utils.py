@@ -1,43 +1,71 @@
 """Strictly utility functions."""
 
 import asyncio
+import atexit
+import functools
 import re
+import threading
 import unicodedata
 from collections.abc import Coroutine
-from concurrent.futures import ThreadPoolExecutor
-from typing import TypeVar
+from typing import Final, TypeVar
+
+# Byte tables for `slugify`'s ASCII text: lowercase and turn whitespace into dashes, and delete
+# anything else that isn't a word character or a dash, as Django's regexes do
+_SLUG_TABLE: Final = bytes(
+    ord("-") if re.match(r"\s", chr(i)) else ord(chr(i).lower()) for i in range(256)
+)
+_SLUG_DELETE: Final = bytes(i for i in range(256) if not re.match(r"[\w\s-]", chr(i)))
+_SLUG_DASHES_RE: Final = re.compile(rb"-{2,}")
 
 
 # TODO: there's a `slugify` pkg, consider using that instead
+@functools.lru_cache(maxsize=4096)
 def slugify(s: str) -> str:
     """Slugify a string, removes unicode.
 
-    Based on `django.utils.text.slugify()`.
+    Based on `django.utils.text.slugify()`. Cached, since it's mostly called on the same labels.
     """
-    fn = unicodedata.normalize("NFKD", str(s)).encode("ascii", "ignore").decode("ascii")
-    fn = re.sub(r"[^\w\s-]", "", fn.lower())
-    fn = re.sub(r"[-\s]+", "-", fn)
-    return fn.strip("-_")
+    s = str(s)
+    if s.isascii():  # nothing to decompose
+        fn = s.encode("ascii")
+    else:
+        fn = unicodedata.normalize("NFKD", s).encode("ascii", "ignore")
+    fn = _SLUG_DASHES_RE.sub(b"-", fn.translate(_SLUG_TABLE, _SLUG_DELETE))
+    return fn.strip(b"-_").decode("ascii")
 
 
 T = TypeVar("T")
 
+_background_loop_lock: Final = threading.Lock()
+
+
+@functools.cache
+def _start_background_loop() -> asyncio.AbstractEventLoop:
+    """Start an event loop that runs forever in a daemon thread, until it's stopped at exit."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="run_async", daemon=True)
+    thread.start()
+
+    @atexit.register
+    def stop() -> None:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    return loop
+
 
 def run_async_in_thread(async_func: Coroutine[None, None, T]) -> T:
     """Useful to lazily run async functions in a sync function running in an async context.
 
-    Runs in a new thread, it's the lazy approach. It circumvents not being able to use
-    `asyncio.run()` because there is already an event loop running.
+    Runs in another thread, it's the lazy approach. It circumvents not being able to use
+    `asyncio.run()` because there is already an event loop running. All calls share one
+    background event loop, started on first use, where calls from different threads run
+    concurrently. A coroutine run this way must not call this function, it would block the loop.
     """
-
-    def run(loop: asyncio.AbstractEventLoop) -> T:
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(async_func)
-
-    loop = asyncio.new_event_loop()
-    with ThreadPoolExecutor() as executor:
-        future = executor.submit(run, loop)
-        return future.result()
+    with _background_loop_lock:
+        loop = _start_background_loop()
+    return asyncio.run_coroutine_threadsafe(async_func, loop).result()
 
 
 __all__ = ["run_async_in_thread", "slugify"]
@@ -0,0 +1,107 @@
+"""Tests for the functions common to all providers."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+import niquests
+import pytest
+import tenacity
+
+from quieromudarme.providers import common
+from quieromudarme.providers.common import (
+    AsyncRateLimiter,
+    WaitRetryAfter,
+    _parse_retry_after,
+    parse_js_object,
+)
+
+
+def test_parse_js_object_unquoted_keys() -> None:
+    """Test that JS object literals with unquoted keys are parsed like the equivalent JSON."""
+    js_content = '{listStore: {paging: {total: 3, "pagesUrl": {}}, $ref: [1, {_a: null}]}}'
+
+    result = parse_js_object(js_content)
+
+    assert result == {
+        "listStore": {"paging": {"total": 3, "pagesUrl": {}}, "$ref": [1, {"_a": None}]}
+    }
+
+
+def _failed_retry_state(exc: BaseException) -> tenacity.RetryCallState:
+    """Retry state of an attempt that raised this exception."""
+    retry_state = tenacity.RetryCallState(tenacity.Retrying(), fn=None, args=(), kwargs={})
+    retry_state.set_exception((type(exc), exc, None))
+    return retry_state
+
+
+def _http_error(retry_after: str | None) -> niquests.HTTPError:
+    """HTTP error for a response with this `Retry-After` header, if any."""
+    resp = niquests.Response()
+    if retry_after is not None:
+        resp.headers["Retry-After"] = retry_after
+    return niquests.HTTPError(response=resp)
+
+
+def test_parse_retry_after_seconds() -> None:
+    """Test that a `Retry-After` in delay seconds is used as is."""
+    assert _parse_retry_after("120") == 120.0
+
+
+@pytest.mark.parametrize("usegmt", [True, False], ids=["gmt", "naive"])
+def test_parse_retry_after_http_date(usegmt: bool) -> None:  # noqa: FBT001
+    """Test that a `Retry-After` HTTP date gives the seconds until then, even without a zone."""
+    retry_at = datetime.now(tz=UTC) + timedelta(seconds=30)
+    value = format_datetime(retry_at if usegmt else retry_at.replace(tzinfo=None), usegmt=usegmt)
+
+    delay = _parse_retry_after(value)
+
+    assert delay is not None
+    assert 25 < delay <= 30
+
+
+def test_parse_retry_after_past_date() -> None:
+    """Test that a `Retry-After` HTTP date in the past means not waiting at all."""
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_parse_retry_after_garbage() -> None:
+    """Test that an unparseable `Retry-After` is ignored."""
+    assert _parse_retry_after("soon") is None
+
+
+def test_wait_retry_after_uses_header() -> None:
+    """Test that the wait is what the provider asked for, up to the maximum."""
+    wait = WaitRetryAfter(tenacity.wait_fixed(5), max_seconds=60)
+
+    assert wait(_failed_retry_state(_http_error("7"))) == 7.0
+    assert wait(_failed_retry_state(_http_error("3600"))) == 60.0
+
+
+def test_wait_retry_after_falls_back() -> None:
+    """Test that the fallback wait is used when there's no usable `Retry-After` header."""
+    wait = WaitRetryAfter(tenacity.wait_fixed(5))
+
+    assert wait(_failed_retry_state(_http_error(None))) == 5.0
+    assert wait(_failed_retry_state(_http_error("soon"))) == 5.0
+    assert wait(_failed_retry_state(ValueError())) == 5.0
+
+
+def test_async_rate_limiter_spaces_out_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that concurrent callers are let through one interval apart, the first right away."""
+    delays: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+
+    async def request_all() -> None:
+        # Frozen clock, so the delays only depend on the rate limiter
+        monkeypatch.setattr(asyncio.get_running_loop(), "time", lambda: 0.0)
+        rate_limiter = AsyncRateLimiter(max_rate=20)
+        await asyncio.gather(*(rate_limiter.wait() for _ in range(4)))
+
+    monkeypatch.setattr(common.asyncio, "sleep", sleep)
+    asyncio.run(request_all())
+
+    # Only three sleeps for four callers, since the first one goes right away
+    assert delays == pytest.approx([0.05, 0.10, 0.15])
@@ -1,17 +1,198 @@
 """Tests for the ZonaProp provider."""
 
+import contextlib
+import queue
+import threading
+import uuid
+from collections.abc import Iterator
+from datetime import UTC, timedelta
 from pathlib import Path
+from typing import Final
+from unittest import mock
 
+import orjson
+import py_mini_racer
+import pytest
+
+from quieromudarme import db
 from quieromudarme.providers import zonaprop
+from quieromudarme.providers.common import find_script_content, parse_js_object, preloaded_state_js
 
 
-def test_process_page() -> None:
-    """Test for processing a ZonaProp search results page."""
-    html_str = Path(
-        "tests/data/zonaprop_departamentos-alquiler-ciudad-de-santa-fe-sf-orden-publicado-descendente.html"
-    ).read_text()
+@pytest.fixture(scope="session")
+def zonaprop_html() -> str:
+    """HTML of a ZonaProp search results page, read once for all tests."""
+    return (
+        Path(
+            "tests/data/zonaprop_departamentos-alquiler-ciudad-de-santa-fe-sf-orden-publicado-descendente.html"
+        )
+        .read_bytes()
+        .decode("utf-8")
+    )
+
 
-    result = zonaprop._process_page_html(html_str)
+def test_process_page(zonaprop_html: str) -> None:
+    """Test for processing a ZonaProp search results page."""
+    result = zonaprop._process_page_html(zonaprop_html)
 
     assert result.total_results == 119
     assert result.total_pages == 6
+
+
+def test_preloaded_state_js_engine_matches_json(zonaprop_html: str) -> None:
+    """Test that evaluating the preloaded state as JS gives the same data as parsing it as JSON."""
+    script_content = find_script_content(zonaprop_html, "preloadedData")
+    assert script_content is not None
+    js_content = preloaded_state_js(script_content)
+
+    from_js = orjson.loads(py_mini_racer.MiniRacer().eval(f"JSON.stringify({js_content})"))
+
+    assert from_js == parse_js_object(js_content)
+
+
+def test_get_search_results_since(monkeypatch: pytest.MonkeyPatch, zonaprop_html: str) -> None:
+    """Test that no more pages are fetched after one with only posts from before `since`."""
+    page_result = zonaprop._process_page_html(zonaprop_html)
+    newest = max(post.modified_at for post in page_result.posts)
+    closed: list[bool] = []
+
+    def iter_search_pages(
+        _url: str, *, max_pages: int | None
+    ) -> Iterator[zonaprop.ZonaPropSearchResult]:
+        del max_pages
+        try:
+            yield from [page_result] * 3
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(zonaprop, "iter_search_pages", iter_search_pages)
+
+    _, all_posts = zonaprop.get_search_results("url", None, since=newest)
+    # A naive `since` is taken as UTC instead of failing to compare with the posts' dates
+    naive_since = newest.astimezone(UTC).replace(tzinfo=None) + timedelta(seconds=1)
+    _, new_posts = zonaprop.get_search_results("url", None, since=naive_since)
+
+    assert len(all_posts) == 3 * len(page_result.posts)
+    assert len(new_posts) == len(page_result.posts)
+    assert closed == [True, True]
+
+
+def test_fetch_latest_results_keeps_price_changes_on_later_pages(
+    monkeypatch: pytest.MonkeyPatch, zonaprop_html: str
+) -> None:
+    """Test that a price change on a later page is fetched, though its post is older."""
+    page_result = zonaprop._process_page_html(zonaprop_html)
+    newest = max(post.modified_at for post in page_result.posts)
+    old_post = page_result.posts[-1]
+    changed_post = old_post.model_copy(update={"price": old_post.price / 2})
+    changed_page = page_result.model_copy(update={"posts": [changed_post]})
+
+    def iter_search_pages(
+        _url: str, *, max_pages: int | None
+    ) -> Iterator[zonaprop.ZonaPropSearchResult]:
+        del max_pages
+        yield from [page_result, page_result, changed_page]
+
+    monkeypatch.setattr(zonaprop, "iter_search_pages", iter_search_pages)
+    search = db.GetHousingSearchesResult(
+        id=uuid.uuid4(),
+        user=db.GetHousingSearchesResultUser(
+            id=uuid.uuid4(), tier=db.UserTier.FREE, telegram_id=1, telegram_username=None
+        ),
+        provider="zonaprop",
+        url="https://www.zonaprop.com.ar/departamentos-alquiler.html",
+        query_payload=None,
+        # All posts are older than the last search
+        last_search_at=newest + timedelta(days=1),
+        created_at=newest,
+    )
+
+    posts = zonaprop.fetch_latest_results(search)
+
+    assert len(posts) == 2 * len(page_result.posts) + 1
+    assert posts[-1].price == old_post.price / 2
+
+
+# URLs of the pages of a fake search, for testing how they're fetched
+FAKE_PAGE_URLS: Final = [f"https://www.zonaprop.com.ar/page-{n}.html" for n in range(1, 11)]
+
+
+def _fake_page_html(page_url: str) -> str:
+    """Fake HTML of a page, just its number."""
+    return page_url.removeprefix("https://www.zonaprop.com.ar/page-").removesuffix(".html")
+
+
+@pytest.fixture
+def fake_browsers(monkeypatch: pytest.MonkeyPatch) -> list[threading.Event]:
+    """Fake browsers and HTTP requests to search the fake pages, collecting workers' stop events.
+
+    Only even pages can be fetched without a browser, and the browser that's validated with
+    page 5 fails.
+    """
+
+    def open_validated_page(_sb: mock.MagicMock, url: str) -> str:
+        if url == FAKE_PAGE_URLS[4]:
+            msg = "Bot check not passed"
+            raise zonaprop.ZonaPropError(msg)
+        return _fake_page_html(url)
+
+    def fetch_pages_html(
+        _sb: mock.MagicMock, numbered_urls: list[tuple[int, str]]
+    ) -> Iterator[tuple[int, str]]:
+        for page_num, page_url in numbered_urls:
+            yield page_num, _fake_page_html(page_url)
+
+    async def fetch_pages_html_over_http(page_urls: list[str], *_args: object) -> list[str | None]:
+        return [
+            html if int(html := _fake_page_html(page_url)) % 2 == 0 else None
+            for page_url in page_urls
+        ]
+
+    def process_page_html(page_html: str) -> zonaprop.ZonaPropSearchResult:
+        return zonaprop.ZonaPropSearchResult.model_construct(
+            posts=[],
+            total_results=200,
+            total_pages=len(FAKE_PAGE_URLS),
+            page_urls=FAKE_PAGE_URLS,
+            search_title=page_html,
+        )
+
+    stops: list[threading.Event] = []
+    fetch_in_new_browser = zonaprop._fetch_pages_html_in_new_browser
+
+    def fetch_pages_html_in_new_browser(
+        numbered_urls: list[tuple[int, str]],
+        html_queue: queue.SimpleQueue[tuple[int, str]],
+        stop: threading.Event,
+    ) -> None:
+        stops.append(stop)
+        fetch_in_new_browser(numbered_urls, html_queue, stop)
+
+    monkeypatch.setattr(zonaprop, "_open_browser", lambda: contextlib.nullcontext(mock.MagicMock()))
+    monkeypatch.setattr(zonaprop, "_open_validated_page", open_validated_page)
+    monkeypatch.setattr(zonaprop, "_fetch_pages_html", fetch_pages_html)
+    monkeypatch.setattr(zonaprop, "_fetch_pages_html_over_http", fetch_pages_html_over_http)
+    monkeypatch.setattr(zonaprop, "_process_page_html", process_page_html)
+    monkeypatch.setattr(
+        zonaprop, "_fetch_pages_html_in_new_browser", fetch_pages_html_in_new_browser
+    )
+    return stops
+
+
+def test_iter_search_pages_in_order(fake_browsers: list[threading.Event]) -> None:
+    """Test that all pages are yielded in order, even those of a browser that failed."""
+    pages = zonaprop.iter_search_pages(FAKE_PAGE_URLS[0], max_pages=None)
+
+    assert [page.search_title for page in pages] == [str(n) for n in range(1, 11)]
+    assert len(fake_browsers) == 2
+
+
+def test_iter_search_pages_close_stops_browsers(fake_browsers: list[threading.Event]) -> None:
+    """Test that closing the pages early tells the other browsers to stop."""
+    pages = zonaprop.iter_search_pages(FAKE_PAGE_URLS[0], max_pages=None)
+    assert [next(pages).search_title, next(pages).search_title] == ["1", "2"]
+
+    pages.close()
+
+    assert len(fake_browsers) == 2
+    assert all(stop.is_set() for stop in fake_browsers)